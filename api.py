@@ -0,0 +1,74 @@
+import json, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from controller import Controller
+
+with open("data/links.json", "r", encoding="utf-8") as f:
+    LINKS = json.load(f)
+
+MODES = ["pre_qualifying", "post_qualifying", "season"]
+
+
+class Api:
+    # Plain HTTP in front of Controller, GET /predict?mode=...&track=... answers with the ranking as JSON.
+    # The Streamlit app only serves its page over HTTP, so this is what http_target in loadtest.py drives.
+    def __init__(self, controller, host="127.0.0.1", port=8000):
+        self.controller = controller
+        self.tracks = {link_set['id']: link_set for link_set in LINKS.values()}
+        self.server = ThreadingHTTPServer((host, port), self.handler())
+        self.url = f"http://{host}:{self.server.server_address[1]}/predict"
+        self._thread = None
+
+    def respond(self, query):
+        mode = query.get("mode", [None])[0]
+        if mode not in MODES:
+            return 400, {"error": f"mode must be one of {', '.join(MODES)}"}
+        if mode == "season":
+            return 200, json.loads(self.controller.predict_season().to_json(orient="records"))
+
+        try:
+            link_set = self.tracks[int(query.get("track", [None])[0])]
+        except (TypeError, ValueError, KeyError):
+            return 400, {"error": "track must be a TrackId from links.json"}
+        ranking, _ = self.controller.scores({"mode": mode, "track": link_set['id'], "link": link_set['url_quali']})
+        return 200, json.loads(ranking.to_json(orient="records"))
+
+    def handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != "/predict":
+                    status, body = 404, {"error": "not found"}
+                else:
+                    try:
+                        status, body = api.respond(parse_qs(url.query))
+                    except Exception as e:
+                        status, body = 500, {"error": str(e)}
+                page = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(page)))
+                self.end_headers()
+                self.wfile.write(page)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    api = Api(Controller())
+    print(f"Serving predictions on {api.url}")
+    api.server.serve_forever()
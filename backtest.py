@@ -0,0 +1,113 @@
+import warnings, pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from controller import Controller, points_map
+from features import FeatureStore
+from dataset import ORDER, load
+from registry import Registry
+
+_root = None
+_controllers = {}
+
+
+def _init_worker(models):
+    global _root
+    _root = models
+
+
+def _controller_for(version):
+    # Load each model version once per process rather than once per cut-off
+    if version not in _controllers:
+        _controllers[version] = Controller(_root, version)
+    return _controllers[version]
+
+
+def load_history(path):
+    history = load(path)
+    if not set(ORDER).issubset(history.columns):
+        raise ValueError(f"{path} has no Year/Round columns to split into seasons, regenerate it from the notebook")
+    return history
+
+
+def load_season(path, year):
+    # The season's races in calendar order, and everything that was known before it started
+    history = load_history(path)
+    season = history.loc[history.Year == year]
+    races = [race for _, race in season.groupby("Round", sort=True)]
+    return history.loc[history.Year < year], races
+
+
+def standings(races, codes):
+    points = dict.fromkeys(codes, 0)
+    for race in races:
+        for code, position in zip(race.Code, race.Position):
+            position = FeatureStore.convert_position(position)
+            if code in points and position in points_map:
+                points[code] += points_map[position]
+    return pd.DataFrame(points.items(), columns=["Code", "Points"])
+
+
+def replay_cutoff(path, year, cutoff, version):
+    _controller = _controller_for(version)
+    history, races = load_season(path, year)
+    drivers = pd.concat(races)[["Code", "Team"]].drop_duplicates("Code", keep="last").reset_index(drop=True)
+
+    # Rebuild the form features as they stood at the cut-off
+    _controller.features = FeatureStore()
+    _controller.features.add_race(history)
+    for race in races[:cutoff]:
+        _controller.features.add_race(race)
+
+    projected = standings(races[:cutoff], drivers.Code)
+    for race in races[cutoff:]:
+        ranking = _controller.rank_pre(drivers, int(race.TrackId.iloc[0]))
+        for i in range(10):
+            projected.loc[projected.Code == ranking[i], "Points"] += points_map[i+1]
+
+    final = standings(races, drivers.Code)
+    projected = projected.sort_values(by="Points", ascending=False).reset_index(drop=True)
+    final = final.sort_values(by="Points", ascending=False).reset_index(drop=True)
+    compared = pd.merge(
+        projected.reset_index().rename(columns={"index": "Projected", "Points": "ProjectedPoints"}),
+        final.reset_index().rename(columns={"index": "Final"}),
+        on=["Code"]
+    )
+    return {
+        "Races": len(races),
+        "Cutoff": cutoff,
+        "RankError": (compared.Projected - compared.Final).abs().mean(),
+        "PointsError": (compared.ProjectedPoints - compared.Points).abs().mean(),
+        "Champion": projected.Code[0] == final.Code[0]
+    }
+
+
+def in_sample(registry, version, year):
+    trained_through = registry.manifest(version).get("trained_through")
+    return trained_through is None or trained_through >= year
+
+
+def replay(years=None, history="data/all_seasons.csv", versions=None, models="models", workers=None):
+    # Every season but the first, which has no earlier results to build form from, is replayed by default.
+    # versions maps a year to the registry version that was live for it, the active one otherwise.
+    # A season still in progress is scored against the standings of its completed races.
+    registry = Registry(models)
+    seasons = load_history(history).Year
+    years = years if years is not None else [int(year) for year in sorted(seasons.unique())[1:]]
+    versions = versions if versions is not None else {}
+    jobs = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(models,)) as pool:
+        for year in years:
+            version = versions.get(year) or registry.current()
+            if in_sample(registry, version, year):
+                warnings.warn(f"Model version {version} may have been trained on season {year}, "
+                              "its replay is in-sample and cannot detect regressions")
+            _, races = load_season(history, year)
+            for cutoff in range(len(races)):
+                jobs.append((year, pool.submit(replay_cutoff, history, year, cutoff, version)))
+        results = [{"Season": year, **job.result()} for year, job in jobs]
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    results = replay()
+    print(results)
+    print(results.groupby("Season")[["RankError", "PointsError", "Champion"]].mean())
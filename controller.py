@@ -1,10 +1,15 @@
-import joblib, pandas as pd, requests, json
+import pandas as pd, numpy as np, requests, json, threading, time
 from bs4 import BeautifulSoup
 from datetime import date
+from features import FeatureStore, FEATURES
+from registry import Registry
+from dataset import team_map
 
 with open("data/links.json", "r", encoding="utf-8") as f:
     LINKS = json.load(f)
 
+F1_HOST = "https://www.formula1.com"
+
 points_map = {
     1: 25,
     2: 18,
@@ -19,30 +24,21 @@ points_map = {
 }
 
 class Controller:
-    def __init__(self):
-        self.nn_pre_quali = joblib.load("models/nn_pre_quali.pkl")
-        self.nn_post_quali = joblib.load("models/nn_post_quali.pkl")
-        self.rf_pre_quali = joblib.load("models/rf_pre_quali.pkl")
-        self.rf_post_quali = joblib.load("models/rf_post_quali.pkl")
+    def __init__(self, models="models", version=None):
+        self.registry = Registry(models)
+        self.models = self.registry.load(version)
+        self.previous = None
+        self.swap_error = None
+        # Serialises swaps and rollbacks, predictions never wait on it
+        self.swap_lock = threading.RLock()
         self.drivers = pd.read_csv('data/drivers.csv')
-        self.preprocessor_post = joblib.load("models/preprocessor_post.pkl")
-        self.preprocessor_pre = joblib.load("models/preprocessor_pre.pkl")
-        self.team_map = {
-            'Alpine F1 Team': "Alpine",
-            'Haas F1 Team': "Haas",
-            'Toro Rosso': "Racing Bulls",
-            'Red Bull Racing': "Red Bull",
-            'RB F1 Team': "Red Bull",
-            'Racing Point': "Aston Martin",
-            'Red Bull Racing Honda RBPT': "Red Bull",
-            'Alpine Renault': "Alpine",
-            'Aston Martin Aramco Mercedes':'Aston Martin',
-            'McLaren Mercedes':"McLaren",
-            'Williams Mercedes': "Williams",
-            'AlphaTauri Honda RBPT': "Racing Bulls",
-            'Haas Ferrari':"Ferrari",
-            'RB Honda RBPT':"Red Bull"
-        }
+        self.features = FeatureStore.from_csv("data/all_seasons.csv")
+        self.team_map = team_map
+        self.cache = {}
+        # Seconds before the live standings are fetched again
+        self.standings_ttl = 3600
+        # Point at a local stand-in (see loadtest.py) to run without formula1.com
+        self.host = F1_HOST
 
     @staticmethod
     def convert_time(s):
@@ -54,7 +50,8 @@ class Controller:
             if len(s) == len("1:00:000"):
                 return float(int(s[-3:]))/1000 + int(s[-6:-4]) + 60 * int(s[0])
 
-    def preprocess_post(self, df):
+    def preprocess_post(self, df, models=None):
+        models = models if models is not None else self.models
         df.Team = df.Team.replace(self.team_map)
         df.TrackId = df.TrackId.astype(int)
         df = df.dropna()
@@ -64,18 +61,26 @@ class Controller:
         df.loc[:, "Q1"] = df["Q1"].apply(self.convert_time)
         df.loc[:, "Q2"] = df["Q2"].apply(self.convert_time)
         df.loc[:, "Q3"] = df["Q3"].apply(self.convert_time)
+        df[FEATURES] = self.features.get(df)
 
-        return self.preprocessor_post.transform(df)
+        return models["preprocessor_post"].transform(df)
 
-    def preprocess_pre(self, df):
+    def preprocess_pre(self, df, models=None):
+        models = models if models is not None else self.models
         df.Team = df.Team.replace(self.team_map)
         df.TrackId = df.TrackId.astype(int)
+        df[FEATURES] = self.features.get(df)
         print(df)
-        return self.preprocessor_pre.transform(df)
+        return models["preprocessor_pre"].transform(df)
     
+    def add_race(self, df):
+        self.features.add_race(df)
+        # Cached rankings were computed with the previous form features
+        self.cache = {}
+
     def extract_qualifying(self, link):
         data = pd.DataFrame(columns=["Code", "Q1", "Q2", "Q3", "Grid"])
-        soup = BeautifulSoup(requests.get(link).text, "lxml")
+        soup = BeautifulSoup(requests.get(link.replace(F1_HOST, self.host)).text, "lxml")
         table = soup.find("tbody")
         rows = table.find_all("tr")
 
@@ -85,26 +90,78 @@ class Controller:
             data.loc[len(data)] = [code, q1, q2, q3, grid]
         return data
 
-    def predict(self, args):
+    def extract_race(self, link, track):
+        data = pd.DataFrame(columns=["Code", "Position"])
+        soup = BeautifulSoup(requests.get(link.replace(F1_HOST, self.host)).text, "lxml")
+        table = soup.find("tbody")
+        rows = table.find_all("tr")
+
+        for row in rows:
+            position, _, name, _, _, _, _ = [val.text for val in row.find_all("td")]
+            data.loc[len(data)] = [name[-3:], position]
+        data["TrackId"] = track
+        return data
+
+    def predict(self, args, refresh=False):
+        ranking, _ = self.scores(args, refresh)
+        return list(ranking.Code)
+
+    def scores(self, args, refresh=False, models=None):
+        # Hold on to one model version for the whole request, a swap may happen meanwhile
+        models = models if models is not None else self.models
+        key = (models["version"], args['mode'], args['track'])
+        if refresh or key not in self.cache:
+            self.cache[key] = self._scores(args, models)
+        ranking, ahead = self.cache[key]
+        return ranking.copy(), ahead.copy()
+
+    def score(self, df, mode, models=None):
+        models = models if models is not None else self.models
+        if mode == "pre_qualifying":
+            df_processed = self.preprocess_pre(df, models)
+            nn, rf = models["nn_pre_quali"], models["rf_pre_quali"]
+        else:
+            df_processed = self.preprocess_post(df, models)
+            nn, rf = models["nn_post_quali"], models["rf_post_quali"]
+
+        # Each tree's prediction plus the MLP is one sample of a driver's score; their mean is nn + rf
+        pred_nn = nn.predict(df_processed)
+        pred_trees = np.stack([tree.predict(df_processed) for tree in rf.estimators_])
+        samples = pred_nn + pred_trees
+        ranking = pd.concat([df.Code, pd.DataFrame({
+            "Pred": samples.mean(axis=0),
+            "Spread": pred_trees.std(axis=0)
+        })], axis=1).sort_values(by="Pred")
+
+        # ahead.loc[a, b] is the share of samples in which a finishes ahead of b
+        order = ranking.index.to_numpy()
+        samples = samples[:, order]
+        ahead = pd.DataFrame((samples[:, :, None] < samples[:, None, :]).mean(axis=0), index=ranking.Code, columns=ranking.Code)
+        return ranking.reset_index(drop=True), ahead
+
+    def rank_pre(self, drivers, track):
+        df = pd.concat([drivers.reset_index(drop=True), pd.Series([track] * len(drivers), name="TrackId")], axis=1)
+        ranking, _ = self.score(df, "pre_qualifying")
+        return list(ranking.Code)
+
+    def _scores(self, args, models):
         if args['mode'] == "pre_qualifying":
             df = pd.concat([self.drivers, pd.Series([args['track']] * len(self.drivers), name="TrackId")], axis=1)
-            df_processed = self.preprocess_pre(df)
-            pred_nn = self.nn_pre_quali.predict(df_processed)
-            pred_rf = self.rf_pre_quali.predict(df_processed)
-            ranking = pd.concat([df.Code, pd.DataFrame(pred_nn + pred_rf, columns=["Pred"])], axis=1).sort_values(by="Pred")
-            return list(ranking.Code)
         else:
             df = pd.merge(self.drivers, self.extract_qualifying(args['link']), how='left', on=["Code"])
             df = pd.concat([df, pd.Series([args['track']] * len(self.drivers), name="TrackId")], axis=1)
-            df_processed = self.preprocess_post(df)
-            pred_nn = self.nn_post_quali.predict(df_processed)
-            pred_rf = self.rf_post_quali.predict(df_processed)
-            ranking = pd.concat([df.Code, pd.DataFrame(pred_nn + pred_rf, columns=["Pred"])], axis=1).sort_values(by="Pred")
-
-            return list(ranking.Code)
+            # Drop drivers missing from the qualifying page here so scores stay aligned with codes
+            df = df.dropna().reset_index(drop=True)
+        return self.score(df, args['mode'], models)
         
-    def get_standings(self):
-        soup = BeautifulSoup(requests.get("https://www.formula1.com/en/results/2025/drivers").text, 'lxml')
+    def get_standings(self, refresh=False):
+        return self._standings(refresh)[1]
+
+    def _standings(self, refresh=False):
+        fetched, df = self.cache.get("standings", (None, None))
+        if not refresh and fetched is not None and time.time() - fetched < self.standings_ttl:
+            return fetched, df.copy()
+        soup = BeautifulSoup(requests.get(f"{self.host}/en/results/2025/drivers").text, 'lxml')
         df = pd.DataFrame([], columns=["Code", "Points"])
         table = soup.find("tbody")
         rows = table.find_all("tr")[:20] 
@@ -115,14 +172,95 @@ class Controller:
             df.loc[len(df)] = [code, points]
 
         df.loc[:, "Points"] = df.Points.astype(int)
-        return df
+        fetched = time.time()
+        self.cache["standings"] = (fetched, df)
+        return fetched, df.copy()
         
-    def predict_season(self):
-        current = self.get_standings()
+    def predict_season(self, today=None, refresh=False):
+        today = today if today is not None else int(date.today().strftime("%j"))
+        models = self.models
+        # Keyed by the standings fetch, so a projection never outlives the standings it was built on
+        fetched, current = self._standings(refresh)
+        key = (models["version"], "season", today, fetched)
+        if not refresh and key in self.cache:
+            return self.cache[key].copy()
         for link_set in LINKS.values():
-            if link_set['day'] > int(date.today().strftime("%j")):
-                ranking = self.predict({"mode":"pre_qualifying", 'track':link_set['id']})
+            if link_set['day'] > today:
+                ranking = list(self.scores({"mode":"pre_qualifying", 'track':link_set['id']}, refresh=refresh, models=models)[0].Code)
                 for i in range(10):
                     current.loc[current.Code == ranking[i], "Points"] += points_map[i+1]
-        return current.sort_values(by="Points", ascending=False).reset_index(drop=True)
+        for stale in [k for k in list(self.cache) if k != "standings" and k[1] == "season" and k[3] != fetched]:
+            self.cache.pop(stale, None)
+        self.cache[key] = current.sort_values(by="Points", ascending=False).reset_index(drop=True)
+        return self.cache[key].copy()
+
+    def validate(self, models):
+        df = pd.concat([self.drivers, pd.Series([next(iter(LINKS.values()))['id']] * len(self.drivers), name="TrackId")], axis=1)
+        ranking, _ = self.score(df, "pre_qualifying", models)
+        if len(ranking) != len(self.drivers) or not np.isfinite(ranking.Pred).all():
+            raise ValueError(f"Model version {models['version']} failed pre-qualifying validation")
+
+        # A recorded qualifying session as plain strings, the shape extract_qualifying scrapes
+        season = pd.read_csv("data/season_2025.csv", dtype=str, keep_default_na=False)
+        df = season.loc[season.TrackId == season.TrackId.iloc[0], ["TrackId", "Code", "Team", "Q1", "Q2", "Q3", "Grid"]]
+        df = df.reset_index(drop=True)
+        ranking, _ = self.score(df, "post_qualifying", models)
+        if len(ranking) != len(df) or not np.isfinite(ranking.Pred).all():
+            raise ValueError(f"Model version {models['version']} failed post-qualifying validation")
+
+    def swap(self, version=None, background=True):
+        if background:
+            thread = threading.Thread(target=self._swap, args=(version,), daemon=True)
+            thread.start()
+            return thread
+        return self._swap(version)
+
+    def _swap(self, version=None):
+        with self.swap_lock:
+            version = version if version is not None else self.registry.current()
+            if version == self.models["version"]:
+                return version
+            try:
+                if self.previous is not None and self.previous["version"] == version:
+                    models = self.previous
+                else:
+                    models = self.registry.load(version)
+                    self.validate(models)
+            except Exception as e:
+                self.swap_error = e
+                raise
+
+            # Replacing the reference is atomic, in-flight requests finish on the version they started with
+            self.previous, self.models = self.models, models
+            self.swap_error = None
+            # Keep the cached predictions of both versions so a rollback starts warm
+            keep = {self.models["version"], self.previous["version"]}
+            self.cache = {key: val for key, val in list(self.cache.items()) if key == "standings" or key[0] in keep}
+            return version
+
+    def rollback(self):
+        with self.swap_lock:
+            if self.previous is None:
+                raise ValueError("No previous model version to roll back to")
+            version = self.previous["version"]
+            # Activate first so the watcher cannot swap the rolled-back version straight back in
+            self.registry.activate(version)
+            self._swap(version)
+            return version
+
+    def watch(self, interval=60):
+        # Picks up releases activated in the registry without restarting the app
+        def loop():
+            rejected = set()
+            while True:
+                version = self.registry.current()
+                if version != self.models["version"] and version not in rejected:
+                    try:
+                        self._swap(version)
+                    except Exception:
+                        rejected.add(version)
+                time.sleep(interval)
 
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,75 @@
+import glob, os, pandas as pd
+from utils import checksum
+
+CACHE = "data/.cache"
+SENTINELS = ["\\N", "DQ", "NC"]
+# Chronological key, rows are otherwise grouped by team rather than by date
+ORDER = ["Year", "Round"]
+DNF = 21
+
+team_map = {
+    'Alpine F1 Team': "Alpine",
+    'Haas F1 Team': "Haas",
+    'Toro Rosso': "Racing Bulls",
+    'Red Bull Racing': "Red Bull",
+    'RB F1 Team': "Red Bull",
+    'Racing Point': "Aston Martin",
+    'Red Bull Racing Honda RBPT': "Red Bull",
+    'Alpine Renault': "Alpine",
+    'Aston Martin Aramco Mercedes':'Aston Martin',
+    'McLaren Mercedes':"McLaren",
+    'Williams Mercedes': "Williams",
+    'AlphaTauri Honda RBPT': "Racing Bulls",
+    'Haas Ferrari':"Ferrari",
+    'RB Honda RBPT':"Red Bull"
+}
+
+_loaded = {}
+
+
+def convert_times(s):
+    # Vectorised Controller.convert_time: "m:ss.mmm" to seconds, anything else to NaN
+    parts = s.str.extract(r"^(\d):(\d\d)\.(\d\d\d)$").astype(float)
+    return 60 * parts[0] + parts[1] + parts[2] / 1000
+
+
+def convert_positions(s):
+    return pd.to_numeric(s.replace(SENTINELS, str(DNF)), errors="coerce").fillna(DNF).astype("int8")
+
+
+def parse(path):
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    parsed = pd.DataFrame({
+        "TrackId": pd.to_numeric(df.TrackId).astype("int16"),
+        "Code": df.Code.astype("category"),
+        "Team": df.Team.replace(team_map).astype("category"),
+        "Q1": convert_times(df.Q1),
+        "Q2": convert_times(df.Q2),
+        "Q3": convert_times(df.Q3),
+        "Grid": convert_positions(df.Grid),
+        "Position": convert_positions(df.Position)
+    })
+    if set(ORDER).issubset(df.columns):
+        parsed["Year"] = pd.to_numeric(df.Year).astype("int16")
+        parsed["Round"] = pd.to_numeric(df.Round).astype("int8")
+    return parsed
+
+
+def load(path="data/all_seasons.csv", cache=CACHE):
+    # The cache file is named after the source's checksum, so editing the CSV invalidates it
+    digest = checksum(path)
+    if digest not in _loaded:
+        name = os.path.splitext(os.path.basename(path))[0]
+        cached = os.path.join(cache, f"{name}.{digest[:16]}.pkl")
+        if os.path.exists(cached):
+            df = pd.read_pickle(cached)
+        else:
+            df = parse(path)
+            os.makedirs(cache, exist_ok=True)
+            for stale in glob.glob(os.path.join(cache, f"{name}.*.pkl")):
+                os.remove(stale)
+            df.to_pickle(cached + ".tmp")
+            os.replace(cached + ".tmp", cached)
+        _loaded[digest] = df
+    # Callers clean columns in place, so never hand out the shared frame
+    return _loaded[digest].copy()
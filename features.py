@@ -0,0 +1,84 @@
+import pandas as pd, warnings
+from collections import deque
+from dataset import DNF, ORDER, load
+
+FEATURES = ["FormAvg", "FormDNF", "TrackAvg", "TrackStarts"]
+
+
+class FeatureStore:
+    # Rolling form per driver and finishing history per driver x track, updated in O(new rows)
+    def __init__(self, window=10):
+        self.window = window
+        self.drivers = {}
+        self.tracks = {}
+
+    @staticmethod
+    def convert_position(p):
+        try:
+            return int(float(p))
+        except (TypeError, ValueError):
+            return DNF
+
+    def add_result(self, code, track, position):
+        position = self.convert_position(position)
+        track = int(track)
+
+        form = self.drivers.setdefault(code, {"positions": deque(), "total": 0, "dnfs": 0})
+        form["positions"].append(position)
+        form["total"] += position
+        form["dnfs"] += position == DNF
+        if len(form["positions"]) > self.window:
+            dropped = form["positions"].popleft()
+            form["total"] -= dropped
+            form["dnfs"] -= dropped == DNF
+
+        history = self.tracks.setdefault((code, track), [0, 0])
+        history[0] += position
+        history[1] += 1
+
+    @staticmethod
+    def chronological(df):
+        if not set(ORDER).issubset(df.columns):
+            raise ValueError("Rows need Year and Round columns to be replayed in date order, "
+                             "regenerate all_seasons.csv from the notebook")
+        return df.sort_values(ORDER, kind="stable")
+
+    def add_race(self, df):
+        if set(ORDER).issubset(df.columns):
+            df = self.chronological(df)
+        for code, track, position in zip(df.Code, df.TrackId, df.Position):
+            self.add_result(code, track, position)
+
+    def lookup(self, code, track):
+        form = self.drivers.get(code)
+        history = self.tracks.get((code, int(track)))
+        n = len(form["positions"]) if form else 0
+        return [
+            form["total"] / n if n else None,
+            form["dnfs"] / n if n else None,
+            history[0] / history[1] if history else None,
+            history[1] if history else 0
+        ]
+
+    def get(self, df):
+        return pd.DataFrame([self.lookup(code, track) for code, track in zip(df.Code, df.TrackId)],
+                            columns=FEATURES, index=df.index, dtype=float)
+
+    def build(self, df):
+        # Features as they stood before each row, so training never sees the race it predicts
+        ordered = self.chronological(df)
+        rows = []
+        for code, track, position in zip(ordered.Code, ordered.TrackId, ordered.Position):
+            rows.append(self.lookup(code, track))
+            self.add_result(code, track, position)
+        return pd.DataFrame(rows, columns=FEATURES, index=ordered.index, dtype=float).reindex(df.index)
+
+    @classmethod
+    def from_csv(cls, path="data/all_seasons.csv", window=10):
+        store = cls(window)
+        df = load(path)
+        if not set(ORDER).issubset(df.columns):
+            # The shipped preprocessors drop the feature columns, so serving can go on meanwhile
+            warnings.warn(f"{path} has no Year/Round columns, form features follow file order instead of date order")
+        store.add_race(df)
+        return store
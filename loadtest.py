@@ -0,0 +1,167 @@
+import json, os, random, threading, time, numpy as np, pandas as pd, requests
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+from backtest import standings
+from dataset import DNF, load
+
+with open("data/links.json", "r", encoding="utf-8") as f:
+    LINKS = json.load(f)
+
+MODES = ["pre_qualifying", "post_qualifying", "season"]
+STANDINGS_PATH = "/en/results/2025/drivers"
+
+
+class StandIn:
+    # Local replacement for formula1.com serving qualifying, race result and standings pages
+    def __init__(self, pages=None, season="data/season_2025.csv", latency=0.0, jitter=0.0, error_rate=0.0, port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.pages = {}
+
+        # Pages rebuilt from the recorded season results, in the layout Controller scrapes
+        # season_2025.csv has no Round column, its races follow the links.json calendar
+        season = load(season)
+        races = {link_set['id']: season.loc[season.TrackId == link_set['id']] for link_set in LINKS.values()}
+        races = {track: race for track, race in races.items() if not race.empty}
+        for link_set in LINKS.values():
+            if link_set['id'] in races:
+                race = races[link_set['id']]
+                self.pages[urlparse(link_set['url_quali']).path] = self.render(
+                    [[grid, "", code, team, *[self.format_time(t) for t in times], ""] for code, team, grid, *times in zip(
+                        race.Code, race.Team, race.Grid, race.Q1, race.Q2, race.Q3
+                    )]
+                )
+                self.pages[urlparse(link_set['url_race']).path] = self.render(
+                    [[position if position != DNF else "NC", "", code, "", "", "", ""] for code, position in zip(race.Code, race.Position)]
+                )
+        current = standings(races.values(), pd.concat(races.values()).Code.unique())
+        current = current.sort_values(by="Points", ascending=False).reset_index(drop=True)
+        self.pages[STANDINGS_PATH] = self.render(
+            [[i + 1, code, "", "", points] for i, (code, points) in enumerate(zip(current.Code, current.Points))]
+        )
+
+        # Pages saved from the live site take precedence, named after their URL path
+        if pages is not None:
+            for name in os.listdir(pages):
+                with open(os.path.join(pages, name), "r", encoding="utf-8") as f:
+                    self.pages["/" + name.removesuffix(".html").replace("__", "/")] = f.read()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self.handler())
+        self.host = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.tracks = [link_set for link_set in LINKS.values() if urlparse(link_set['url_quali']).path in self.pages]
+        self._thread = None
+
+    @staticmethod
+    def format_time(t):
+        return f"{int(t // 60)}:{t % 60:06.3f}" if t == t else ""
+
+    @staticmethod
+    def render(rows):
+        body = "".join("<tr>" + "".join(f"<td>{val}</td>" for val in row) + "</tr>" for row in rows)
+        return f"<html><body><table><tbody>{body}</tbody></table></body></html>"
+
+    def handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(max(0.0, stand_in.latency + random.uniform(-stand_in.jitter, stand_in.jitter)))
+                page = stand_in.pages.get(urlparse(self.path).path)
+                if random.random() < stand_in.error_rate:
+                    self.send_response(503)
+                    page = ""
+                elif page is None:
+                    self.send_response(404)
+                    page = ""
+                else:
+                    self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.end_headers()
+                self.wfile.write(page.encode("utf-8"))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def controller_target(controller, cold=False):
+    # cold=True bypasses Controller's caches on every request, season mode included rescores every race
+    def send(mode, link_set):
+        if mode == "season":
+            return controller.predict_season(refresh=cold)
+        return controller.predict({"mode": mode, "track": link_set['id'], "link": link_set['url_quali']}, refresh=cold)
+    return send
+
+
+def http_target(url, timeout=30):
+    # url is an api.py endpoint, e.g. Api(controller).start().url, the Streamlit page cannot be queried this way
+    def send(mode, link_set):
+        response = requests.get(url, params={"mode": mode, "track": link_set['id']}, timeout=timeout)
+        response.raise_for_status()
+        return response
+    return send
+
+
+def run(target, users=10, requests_per_user=20, tracks=None, mix=(1, 1, 1), seed=0):
+    tracks = tracks if tracks else list(LINKS.values())
+    results = []
+    lock = threading.Lock()
+
+    def user(i):
+        rng = random.Random(seed + i)
+        for _ in range(requests_per_user):
+            mode = rng.choices(MODES, weights=mix)[0]
+            link_set = rng.choice(tracks)
+            start = time.perf_counter()
+            try:
+                target(mode, link_set)
+                ok = True
+            except Exception:
+                ok = False
+            with lock:
+                results.append((mode, time.perf_counter() - start, ok))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        list(pool.map(user, range(users)))
+    elapsed = time.perf_counter() - start
+
+    return report(pd.DataFrame(results, columns=["Mode", "Latency", "Ok"]), elapsed)
+
+
+def report(results, elapsed):
+    rows = []
+    for mode, group in [("all", results)] + list(results.groupby("Mode")):
+        latency = group.Latency.to_numpy()
+        rows.append({
+            "Mode": mode,
+            "Requests": len(group),
+            "Throughput": len(group) / elapsed,
+            "p50": np.percentile(latency, 50),
+            "p95": np.percentile(latency, 95),
+            "p99": np.percentile(latency, 99),
+            "Max": latency.max(),
+            "ErrorRate": 1 - group.Ok.mean()
+        })
+    return pd.DataFrame(rows).set_index("Mode")
+
+
+if __name__ == "__main__":
+    from controller import Controller
+    stand_in = StandIn(latency=0.2, jitter=0.1, error_rate=0.02).start()
+    controller = Controller()
+    controller.host = stand_in.host
+    print(run(controller_target(controller, cold=True), users=8, requests_per_user=10, tracks=stand_in.tracks))
+    stand_in.stop()
@@ -1,6 +1,7 @@
 import streamlit as st, json
 from datetime import date, datetime
 from controller import Controller
+from scheduler import Scheduler
 
 drivers = {
     "ALB": "Alexander Albon",
@@ -76,7 +77,12 @@ st.markdown("""
 # Initialize controller
 @st.cache_resource
 def load_controller():
-    return Controller()
+    controller = Controller()
+    # Pre-warm post-qualifying and season predictions as soon as qualifying ends
+    Scheduler(controller).start()
+    # Swap in newly activated model versions without a restart
+    controller.watch()
+    return controller
 
 controller = load_controller()
 
@@ -0,0 +1,79 @@
+import joblib, json, os, shutil
+from datetime import datetime
+from utils import checksum
+
+ARTIFACTS = ["nn_pre_quali", "nn_post_quali", "rf_pre_quali", "rf_post_quali", "preprocessor_pre", "preprocessor_post"]
+
+
+class Registry:
+    # Each release lives in models/<version>/ with a manifest.json; models/CURRENT names the live one.
+    # A models/ directory holding the .pkl files directly is still loaded as the "legacy" version.
+    def __init__(self, root="models"):
+        self.root = root
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, "manifest.json")))
+
+    def current(self):
+        pointer = os.path.join(self.root, "CURRENT")
+        if os.path.exists(pointer):
+            with open(pointer, "r", encoding="utf-8") as f:
+                return f.read().strip()
+        # Publishing alone never puts a version live, only activate() moves the pointer
+        return "legacy"
+
+    def path(self, version):
+        return self.root if version == "legacy" else os.path.join(self.root, version)
+
+    def manifest(self, version):
+        if version == "legacy":
+            return {"version": version, "files": {}}
+        with open(os.path.join(self.path(version), "manifest.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def publish(self, source, version=None, activate=False, trained_through=None):
+        # trained_through is the last season in the training data, used to keep backtests out-of-sample
+        version = version if version is not None else datetime.now().strftime("%Y%m%d%H%M%S")
+        target = os.path.join(self.root, version)
+        if os.path.exists(target):
+            raise ValueError(f"Model version {version} already exists")
+
+        # Stage next to the target so the final rename is atomic
+        staging = os.path.join(self.root, f".{version}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        manifest = {"version": version, "created": datetime.now().isoformat(), "trained_through": trained_through, "files": {}}
+        for name in ARTIFACTS:
+            shutil.copyfile(os.path.join(source, f"{name}.pkl"), os.path.join(staging, f"{name}.pkl"))
+            manifest["files"][name] = checksum(os.path.join(staging, f"{name}.pkl"))
+        with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=5)
+        os.rename(staging, target)
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        if version != "legacy" and version not in self.versions():
+            raise ValueError(f"Unknown model version {version}")
+        pointer = os.path.join(self.root, "CURRENT")
+        with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(pointer + ".tmp", pointer)
+
+    def load(self, version=None):
+        version = version if version is not None else self.current()
+        path = self.path(version)
+        manifest = self.manifest(version)
+
+        models = {"version": version}
+        for name in ARTIFACTS:
+            file = os.path.join(path, f"{name}.pkl")
+            if version != "legacy" and checksum(file) != manifest["files"][name]:
+                raise ValueError(f"Checksum mismatch for {name} in model version {version}")
+            models[name] = joblib.load(file)
+        return models
@@ -0,0 +1,114 @@
+import json, threading
+from datetime import datetime, timedelta
+
+with open("data/links.json", "r", encoding="utf-8") as f:
+    LINKS = json.load(f)
+
+
+class SystemClock:
+    def now(self):
+        return datetime.now()
+
+
+class SimulatedClock:
+    def __init__(self, start):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def advance(self, delta):
+        self.current += delta
+
+
+class Scheduler:
+    # Qualifying takes place the day before each race in links.json ('day' is the race day),
+    # delay and race_delay are counted from midnight of the qualifying and race days
+    def __init__(self, controller, clock=None, links=LINKS, delay=timedelta(hours=20),
+                 race_delay=timedelta(hours=20), retry=timedelta(minutes=15), max_attempts=8, poll=60):
+        self.controller = controller
+        self.clock = clock if clock is not None else SystemClock()
+        self.delay = delay
+        self.race_delay = race_delay
+        self.retry = retry
+        self.max_attempts = max_attempts
+        self.poll = poll
+        self.log = []
+        self._stop = threading.Event()
+        self._thread = None
+
+        now = self.clock.now()
+        self.jobs = []
+        for track, link_set in links.items():
+            if link_set['day'] >= self.today():
+                race_day = datetime(now.year, 1, 1) + timedelta(days=link_set['day'] - 1)
+                self.jobs.append({"track": track, "kind": "qualifying", "link_set": link_set,
+                                  "due": race_day - timedelta(days=1) + self.delay, "attempts": 0})
+                # The race's points only reach the standings once it has been run
+                self.jobs.append({"track": track, "kind": "race", "link_set": link_set,
+                                  "due": race_day + self.race_delay, "attempts": 0, "added": False})
+        self.jobs.sort(key=lambda job: job["due"])
+
+    def today(self):
+        return int(self.clock.now().strftime("%j"))
+
+    def prefetch(self, job):
+        if job["kind"] == "qualifying":
+            self.controller.predict({
+                "mode": "post_qualifying",
+                "track": job["link_set"]['id'],
+                "link": job["link_set"]['url_quali']
+            }, refresh=True)
+        elif not job["added"]:
+            # Feed the result to the form features once, a retry only has the standings left to fetch
+            self.controller.add_race(self.controller.extract_race(job["link_set"]['url_race'], job["link_set"]['id']))
+            job["added"] = True
+        # A new standings fetch starts a new season projection in Controller's cache
+        self.controller.get_standings(refresh=True)
+        self.controller.predict_season(today=self.today())
+
+    def next_due(self):
+        return self.jobs[0]["due"] if self.jobs else None
+
+    def run_pending(self):
+        now = self.clock.now()
+        while self.jobs and self.jobs[0]["due"] <= now:
+            job = self.jobs.pop(0)
+            job["attempts"] += 1
+            try:
+                self.prefetch(job)
+                self.log.append((now, job["track"], job["kind"], "ok"))
+            except Exception as e:
+                self.log.append((now, job["track"], job["kind"], f"error: {e}"))
+                # Results pages are often published late, so try again shortly after
+                if job["attempts"] < self.max_attempts:
+                    job["due"] = now + self.retry
+                    self.jobs.append(job)
+                    self.jobs.sort(key=lambda job: job["due"])
+                    if job["due"] <= now:
+                        break
+
+    def run_until(self, end):
+        # Replays the schedule on a SimulatedClock without waiting in real time
+        while self.jobs and self.jobs[0]["due"] <= end:
+            self.clock.advance(max(self.jobs[0]["due"] - self.clock.now(), timedelta(0)))
+            self.run_pending()
+        if self.clock.now() < end:
+            self.clock.advance(end - self.clock.now())
+
+    def _loop(self):
+        while not self._stop.is_set() and self.jobs:
+            self.run_pending()
+            self._stop.wait(self.poll)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()